@@ -28,6 +28,7 @@ LinuxCNC A-axis config (INI):
   WRAPPED_ROTARY = 1   for polygon (indexing only)
 """
 import math
+import os
 import sys
 
 # ─── GRIP TYPE ────────────────────────────────────────────────────────────────
@@ -59,6 +60,28 @@ SCHRITT_MM  =   1.0   # X-axis resolution (mm)
 # = blank radius + tool radius + 2mm clearance
 Z_FREIFAHRT = ROHLING_RADIUS + FRAESER_RADIUS + 2.0
 
+# ─── LINE TEMPLATES ───────────────────────────────────────────────────────────
+# Pre-bound %-formats for the lines emitted in the inner loops.
+# G1 lines are assembled word by word: unchanged modal words are omitted.
+G1_X_FMT = "G1 X%.3f".__mod__
+Z_FMT    = " Z%.4f".__mod__
+A_FMT    = " A%.1f".__mod__
+F_FMT    = " F%d".__mod__
+G0_Z_FMT = "G0 Z%.3f\n".__mod__
+G0_X_FMT = "G0 X%.3f\n".__mod__
+
+# One polygon face: retract, index A, approach, plunge, mill along X
+FACE_TEMPLATE = (
+    "; --- Face %d/%d  A=%.1f° ---\n"
+    "G0 Z%.3f              ; retract\n"
+    "G0 A%.2f                 ; index: face perpendicular to tool\n"
+    "G0 X%.3f               ; start position\n"
+    "G1 Z%.4f F%d  ; approach blank surface\n"
+    "G1 Z%.4f  F%d  ; plunge to cut depth\n"
+    "G1 X%.3f F%d  ; mill face\n"
+    "\n"
+)
+
 # ─── COORDINATE SYSTEM (horizontal spindle, from below) ──────────────────────
 
 def z_for_radius(target_r):
@@ -81,20 +104,20 @@ def generate_turning():
     """
     Lathe-style turning: A rotates continuously, Z follows the radius profile,
     X advances simultaneously. Multiple roughing passes + one finishing pass.
+    Yields the program line by line.
     """
-    lines = []
-    lines.append(f"; === {GRIFFTYP.upper()} GRIP – horizontal spindle, cutting from below ===")
-    lines.append(f"; Length: {GRIFF_LAENGE_MM}mm")
+    yield f"; === {GRIFFTYP.upper()} GRIP – horizontal spindle, cutting from below ===\n"
+    yield f"; Length: {GRIFF_LAENGE_MM}mm\n"
     if GRIFFTYP == "zylindrisch":
-        lines.append(f"; Radius: {ZIEL_RADIUS}mm")
+        yield f"; Radius: {ZIEL_RADIUS}mm\n"
     else:
-        lines.append(f"; Radius: {RADIUS_TIP}mm (tip) -> {RADIUS_BUTT}mm (butt)")
-    lines.append(f"; Z=0 at grip axis")
-    lines.append("")
-    lines.append("G21 G90 G94")
-    lines.append(f"G0 Z{Z_FREIFAHRT:.3f}  ; clear of blank")
-    lines.append("G0 X0 A0")
-    lines.append("")
+        yield f"; Radius: {RADIUS_TIP}mm (tip) -> {RADIUS_BUTT}mm (butt)\n"
+    yield f"; Z=0 at grip axis\n"
+    yield "\n"
+    yield "G21 G90 G94\n"
+    yield f"G0 Z{Z_FREIFAHRT:.3f}  ; clear of blank\n"
+    yield "G0 X0 A0\n"
+    yield "\n"
 
     # Build roughing passes from blank down to target
     if GRIFFTYP == "zylindrisch":
@@ -102,47 +125,63 @@ def generate_turning():
     else:
         target_r = min(RADIUS_TIP, RADIUS_BUTT)
 
-    roughing_steps = []
-    r = ROHLING_RADIUS - 1.0
-    while r >= target_r + 0.5:
-        roughing_steps.append(("roughing", r))
-        r -= 1.0
+    # 1mm steps from ROHLING_RADIUS - 1.0 while r >= target_r + 0.5; counted
+    # up front so r does not accumulate float error from repeated subtraction
+    n_rough = max(0, int(math.floor(ROHLING_RADIUS - 1.5 - target_r + 1e-9)) + 1)
+    roughing_steps = [("roughing", ROHLING_RADIUS - 1.0 - k) for k in range(n_rough)]
     roughing_steps.append(("finishing", None))  # None = follow contour
 
     rotations_per_mm = 3   # overlapping passes for good surface
+    a_inc   = 360.0 * rotations_per_mm * SCHRITT_MM
     a_total = 0.0
 
-    for pass_type, fixed_r in roughing_steps:
-        label = f"roughing r={fixed_r:.1f}mm" if fixed_r else "finishing (contour)"
-        lines.append(f"; --- {label} ---")
-        lines.append(f"G0 Z{Z_FREIFAHRT:.3f}")
-        lines.append(f"G0 X{X_START_MM:.3f}")
-
-        x = X_START_MM
-        while True:
-            x = min(x, X_START_MM + GRIFF_LAENGE_MM)
-
-            if fixed_r is not None:
-                r = fixed_r
-            else:
-                r = conical_radius(x) if GRIFFTYP == "konisch" else ZIEL_RADIUS
+    # Last commanded modal values; words that repeat them are left out
+    last_a = 0.0
+    last_f = None
 
-            z = z_for_radius(r)
-            a_total += 360.0 * rotations_per_mm * SCHRITT_MM
-            lines.append(f"G1 X{x:.3f} Z{z:.4f} A{a_total:.1f} F{FEED_CUT}")
+    # X positions are the same for every pass, ending exactly at the grip end
+    x_end = X_START_MM + GRIFF_LAENGE_MM
+    n     = int(math.ceil(GRIFF_LAENGE_MM / SCHRITT_MM)) + 1
+    xs    = [min(X_START_MM + i * SCHRITT_MM, x_end) for i in range(n)]
 
-            if x >= X_START_MM + GRIFF_LAENGE_MM:
-                break
-            x += SCHRITT_MM
-
-        lines.append(f"G0 Z{Z_FREIFAHRT:.3f}")
-        lines.append(f"G0 X{X_START_MM:.3f}")
-        lines.append("")
+    # Finishing contour: the grip type is fixed for the run, so pick the
+    # radius profile once instead of testing GRIFFTYP for every X step
+    if GRIFFTYP == "konisch":
+        contour_zs = [z_for_radius(conical_radius(x)) for x in xs]
+    else:
+        contour_zs = [z_for_radius(ZIEL_RADIUS)] * n
 
-    lines.append(f"G0 Z{Z_FREIFAHRT:.3f}")
-    lines.append("G0 X0")
-    lines.append("M2")
-    return lines
+    for pass_type, fixed_r in roughing_steps:
+        label = f"roughing r={fixed_r:.1f}mm" if fixed_r else "finishing (contour)"
+        yield f"; --- {label} ---\n"
+        yield G0_Z_FMT(Z_FREIFAHRT)
+        yield G0_X_FMT(X_START_MM)
+
+        zs = [z_for_radius(fixed_r)] * n if fixed_r is not None else contour_zs
+        as_ = [a_total + k * a_inc for k in range(1, n + 1)]
+        a_total = as_[-1]
+
+        last_z = Z_FREIFAHRT   # left there by the G0 above
+        for x, z, a in zip(xs, zs, as_):
+            line = G1_X_FMT(x)
+            if abs(z - last_z) > 1e-5:
+                line += Z_FMT(z)
+                last_z = z
+            if a != last_a:
+                line += A_FMT(a)
+                last_a = a
+            if FEED_CUT != last_f:
+                line += F_FMT(FEED_CUT)
+                last_f = FEED_CUT
+            yield line + "\n"
+
+        yield G0_Z_FMT(Z_FREIFAHRT)
+        yield G0_X_FMT(X_START_MM)
+        yield "\n"
+
+    yield f"G0 Z{Z_FREIFAHRT:.3f}\n"
+    yield "G0 X0\n"
+    yield "M2\n"
 
 # ─── POLYGON ─────────────────────────────────────────────────────────────────
 
@@ -153,55 +192,65 @@ def generate_polygon():
     - Z advances to inradius + tool radius (flat cut)
     - X mills full grip length
     - Between faces: Z retracts, A indexes to next face
+    Yields the program header, then one block of lines per face.
     """
     sektor   = 360.0 / POLYGON_SEITEN
     inkreis  = POLYGON_UMKREIS * math.cos(math.pi / POLYGON_SEITEN)
     z_cut    = z_for_radius(inkreis)
     z_entry  = z_for_radius(ROHLING_RADIUS)  # tangent at blank surface
 
-    lines = []
-    lines.append(f"; === POLYGON GRIP ({POLYGON_SEITEN}-sided) – horizontal spindle, from below ===")
-    lines.append(f"; Length: {GRIFF_LAENGE_MM}mm")
-    lines.append(f"; Circumradius: {POLYGON_UMKREIS:.2f}mm  Inradius: {inkreis:.3f}mm")
-    lines.append(f"; Z cut position: {z_cut:.4f}mm from axis")
-    lines.append(f"; {POLYGON_SEITEN} faces, {sektor:.1f}° apart")
-    lines.append(f"; Z=0 at grip axis")
-    lines.append("")
-    lines.append("G21 G90 G94")
-    lines.append(f"G0 Z{Z_FREIFAHRT:.3f}")
-    lines.append("G0 X0 A0")
-    lines.append("")
-
-    for face in range(POLYGON_SEITEN):
-        a_angle = face * sektor
-        lines.append(f"; --- Face {face+1}/{POLYGON_SEITEN}  A={a_angle:.1f}° ---")
-        lines.append(f"G0 Z{Z_FREIFAHRT:.3f}              ; retract")
-        lines.append(f"G0 A{a_angle:.2f}                 ; index: face perpendicular to tool")
-        lines.append(f"G0 X{X_START_MM:.3f}               ; start position")
-        lines.append(f"G1 Z{z_entry:.4f} F{FEED_CUT // 2}  ; approach blank surface")
-        lines.append(f"G1 Z{z_cut:.4f}  F{FEED_CUT // 3}  ; plunge to cut depth")
-        lines.append(f"G1 X{X_START_MM + GRIFF_LAENGE_MM:.3f} F{FEED_CUT}  ; mill face")
-        lines.append("")
-
-    lines.append(f"G0 Z{Z_FREIFAHRT:.3f}")
-    lines.append("G0 X0 A0")
-    lines.append("M2")
-    return lines
+    yield f"; === POLYGON GRIP ({POLYGON_SEITEN}-sided) – horizontal spindle, from below ===\n"
+    yield f"; Length: {GRIFF_LAENGE_MM}mm\n"
+    yield f"; Circumradius: {POLYGON_UMKREIS:.2f}mm  Inradius: {inkreis:.3f}mm\n"
+    yield f"; Z cut position: {z_cut:.4f}mm from axis\n"
+    yield f"; {POLYGON_SEITEN} faces, {sektor:.1f}° apart\n"
+    yield f"; Z=0 at grip axis\n"
+    yield "\n"
+    yield "G21 G90 G94\n"
+    yield f"G0 Z{Z_FREIFAHRT:.3f}\n"
+    yield "G0 X0 A0\n"
+    yield "\n"
+
+    x_end  = X_START_MM + GRIFF_LAENGE_MM
+    angles = [face * sektor for face in range(POLYGON_SEITEN)]
+    for face, a_angle in enumerate(angles):
+        yield FACE_TEMPLATE % (face + 1, POLYGON_SEITEN, a_angle,
+                               Z_FREIFAHRT,
+                               a_angle,
+                               X_START_MM,
+                               z_entry, FEED_CUT // 2,
+                               z_cut, FEED_CUT // 3,
+                               x_end, FEED_CUT)
+
+    yield f"G0 Z{Z_FREIFAHRT:.3f}\n"
+    yield "G0 X0 A0\n"
+    yield "M2\n"
 
 # ─── MAIN ─────────────────────────────────────────────────────────────────────
 
 if GRIFFTYP in ("zylindrisch", "konisch"):
-    gcode_lines = generate_turning()
+    generate = generate_turning
 elif GRIFFTYP == "polygon":
-    gcode_lines = generate_polygon()
+    generate = generate_polygon
 else:
     print(f"Unknown GRIFFTYP: {GRIFFTYP}", file=sys.stderr)
     sys.exit(1)
 
-gcode = "\n".join(gcode_lines)
-print(gcode)
-
 filename = f"griff_{GRIFFTYP}.ngc"
-with open(filename, "w") as f:
-    f.write(gcode)
+tmpname  = filename + ".tmp"
+
+# Stream the G-code to stdout and a temporary file beside the target; the
+# file replaces filename only once the whole program has been written
+out = sys.stdout.buffer.write
+try:
+    with open(tmpname, "wb", buffering=1 << 20) as f:
+        fw = f.write
+        for chunk in generate():
+            data = chunk.encode("utf-8")
+            out(data)
+            fw(data)
+except BaseException:
+    os.unlink(tmpname)
+    raise
+os.replace(tmpname, filename)
 print(f"\n; -> Saved as {filename}", file=sys.stderr)
@@ -18,7 +18,9 @@ Usage:
   Edit taper_data, hollowing parameters and machine parameters below, then:
     python3 hollowing.py > hollowing.ngc
 """
+import bisect
 import math
+import os
 import sys
 
 # ─── TAPER DATA ───────────────────────────────────────────────────────────────
@@ -54,22 +56,40 @@ ZOLL_ZU_MM  = 25.4
 FEED_RATE   = 200     # mm/min
 Z_RAPID     = 3.0     # safe height above workpiece (mm)
 SCHRITT_MM  = 1.0     # toolpath resolution (mm) — 1mm recommended
+Z_TOLERANZ_MM = 0.001 # Z changes below this are merged into one move (mm)
 
 # ─── FUNCTIONS ────────────────────────────────────────────────────────────────
 
-def interpolate_dimension(x_mm, stations):
-    """Linear interpolation of dimension at any X position."""
-    for i in range(len(stations) - 1):
-        x0, d0 = stations[i]
-        x1, d1 = stations[i + 1]
-        if x0 <= x_mm <= x1:
-            t = (x_mm - x0) / (x1 - x0)
-            return d0 + t * (d1 - d0)
-    return None
-
-def sine_transition(t):
+# Loop invariants of compute_factor, evaluated once per sample otherwise
+INV_UEBERGANG = 1.0 / UEBERGANG_MM
+TIP_RAMP_MM   = TIP_SOLID_MM - UEBERGANG_MM   # start of the tip transition
+HALF_STEG_MM  = STEG_BREITE_MM / 2.0
+
+def sample_positions(x_total):
+    """Yield the toolpath X positions, SCHRITT_MM apart, ending at x_total."""
+    n = int(math.ceil(x_total / SCHRITT_MM))
+    for i in range(n + 1):
+        yield min(i * SCHRITT_MM, x_total)
+
+def interpolate_profile(xs, station_x, station_d):
+    """
+    Linear interpolation of the dimension, yielded for each X position in xs.
+    Positions outside the stations are clamped to the tip/butt station.
+    """
+    x_lo, x_hi = station_x[0], station_x[-1]
+    last = len(station_x) - 2
+    find = bisect.bisect_left
+    for x_mm in xs:
+        x_mm = min(max(x_mm, x_lo), x_hi)
+        i = min(max(find(station_x, x_mm) - 1, 0), last)
+        x0, x1 = station_x[i], station_x[i + 1]
+        d0, d1 = station_d[i], station_d[i + 1]
+        t = (x_mm - x0) / (x1 - x0)
+        yield d0 + t * (d1 - d0)
+
+def sine_transition(t, _cos=math.cos, _PI=math.pi):
     """Smooth sine transition, t in [0,1] -> [0,1]."""
-    return 0.5 * (1 - math.cos(math.pi * t))
+    return 0.5 - 0.5 * _cos(_PI * t)
 
 def compute_factor(x_mm, x_total, steg_positions):
     """
@@ -80,9 +100,9 @@ def compute_factor(x_mm, x_total, steg_positions):
     """
     # Tip solid section
     if x_mm < TIP_SOLID_MM:
-        if x_mm < TIP_SOLID_MM - UEBERGANG_MM:
+        if x_mm < TIP_RAMP_MM:
             return 0.0
-        t = (x_mm - (TIP_SOLID_MM - UEBERGANG_MM)) / UEBERGANG_MM
+        t = (x_mm - TIP_RAMP_MM) * INV_UEBERGANG
         return sine_transition(t)
 
     # Butt solid section
@@ -90,23 +110,25 @@ def compute_factor(x_mm, x_total, steg_positions):
     if x_mm > butt_start:
         if x_mm > butt_start + UEBERGANG_MM:
             return 0.0
-        t = (x_mm - butt_start) / UEBERGANG_MM
+        t = (x_mm - butt_start) * INV_UEBERGANG
         return 1.0 - sine_transition(t)
 
-    # Glue lands
-    for steg_center in steg_positions:
-        steg_l  = steg_center - STEG_BREITE_MM / 2.0
-        steg_r  = steg_center + STEG_BREITE_MM / 2.0
+    # Glue lands (ascending, spaced wider than a land plus its transitions):
+    # only the nearest land on either side of x_mm can reach it
+    i = bisect.bisect_left(steg_positions, x_mm)
+    for steg_center in steg_positions[max(i - 1, 0):i + 1]:
+        steg_l  = steg_center - HALF_STEG_MM
+        steg_r  = steg_center + HALF_STEG_MM
         entry_l = steg_l - UEBERGANG_MM
         exit_r  = steg_r + UEBERGANG_MM
 
         if steg_l <= x_mm <= steg_r:
             return 0.0
         elif entry_l <= x_mm < steg_l:
-            t = (x_mm - entry_l) / UEBERGANG_MM
+            t = (x_mm - entry_l) * INV_UEBERGANG
             return 1.0 - sine_transition(t)
         elif steg_r < x_mm <= exit_r:
-            t = (x_mm - steg_r) / UEBERGANG_MM
+            t = (x_mm - steg_r) * INV_UEBERGANG
             return sine_transition(t)
 
     return 1.0  # full hollow depth
@@ -122,10 +144,72 @@ def compute_steg_positions(x_total):
         x += STEG_ABSTAND_MM
     return stege
 
+def _iter_path(x_total, steg_positions, station_x, station_d):
+    """Yield the hollow toolpath over the whole strip as (x, z) samples."""
+    dims = interpolate_profile(sample_positions(x_total), station_x, station_d)
+    for x_mm, dim in zip(sample_positions(x_total), dims):
+        max_depth = max(0.0, (dim / 2.0) - WANDSTAERKE_MM)
+        yield x_mm, -max_depth * compute_factor(x_mm, x_total, steg_positions)
+
+def emit_hollow(path, steg_positions):
+    """Yield the hollowing program for the (x, z) path, one line at a time."""
+    yield "; Hexrod Hollowing G-Code for LinuxCNC\n"
+    yield f"; Tip solid: {TIP_SOLID_MM}mm | Butt solid: {BUTT_SOLID_MM}mm\n"
+    yield f"; Glue lands: {', '.join(f'{s:.1f}mm' for s in steg_positions)}\n"
+    yield f"; Wall thickness: {WANDSTAERKE_MM}mm | Transition: {UEBERGANG_MM}mm\n"
+    yield "\n"
+    yield "G21  ; metric\n"
+    yield "G90  ; absolute\n"
+    yield "G94  ; feed in mm/min\n"
+    yield "\n"
+    yield f"G0 Z{Z_RAPID:.3f}\n"
+    yield "G0 X0\n"
+    yield "\n"
+    yield "; === Hollow milling pass ===\n"
+    yield "\n"
+
+    # Samples whose Z stays within Z_TOLERANZ_MM of the last emitted move are
+    # held back; the last one held is emitted before the next move that leaves
+    # the tolerance band, or before the cut ends
+    cutting = False
+    last_z  = 0.0
+    pending = None
+    for x, z in path:
+        if z < -0.01:
+            if not cutting:
+                yield f"G0 X{x:.3f}\n"
+                yield f"G1 Z{z:.4f} F{FEED_RATE}\n"
+                cutting = True
+                last_z  = z
+            elif abs(z - last_z) > Z_TOLERANZ_MM:
+                if pending:
+                    yield f"G1 X{pending[0]:.3f} Z{pending[1]:.4f} F{FEED_RATE}\n"
+                yield f"G1 X{x:.3f} Z{z:.4f} F{FEED_RATE}\n"
+                last_z  = z
+                pending = None
+            else:
+                pending = (x, z)
+        else:
+            if cutting:
+                if pending:
+                    yield f"G1 X{pending[0]:.3f} Z{pending[1]:.4f} F{FEED_RATE}\n"
+                    pending = None
+                yield f"G1 X{x:.3f} Z{z:.4f} F{FEED_RATE}  ; -> land/end\n"
+                cutting = False
+    if pending:
+        yield f"G1 X{pending[0]:.3f} Z{pending[1]:.4f} F{FEED_RATE}\n"
+
+    yield "\n"
+    yield f"G0 Z{Z_RAPID:.3f}  ; retract\n"
+    yield "G0 X0             ; home\n"
+    yield "M2                ; end\n"
+
 # ─── MAIN ─────────────────────────────────────────────────────────────────────
 
 stations_mm = [(s * ZOLL_ZU_MM, d) for s, d in taper_data]
-x_total     = stations_mm[-1][0]
+station_x   = [x for x, _ in stations_mm]
+station_d   = [d for _, d in stations_mm]
+x_total     = station_x[-1]
 
 steg_positions = compute_steg_positions(x_total)
 
@@ -143,61 +227,22 @@ print(f"; Transition:      {UEBERGANG_MM:.1f} mm",        file=sys.stderr)
 print(f"; Wall thickness:  {WANDSTAERKE_MM:.2f} mm",      file=sys.stderr)
 print(f"; ============================================", file=sys.stderr)
 
-# Build toolpath
-path = []
-x = 0.0
-while True:
-    x = min(x, x_total)
-    dim = interpolate_dimension(x, stations_mm)
-    if dim is None:
-        break
-    max_depth = max(0.0, (dim / 2.0) - WANDSTAERKE_MM)
-    factor = compute_factor(x, x_total, steg_positions)
-    z = -max_depth * factor
-    path.append((x, z))
-    if x >= x_total:
-        break
-    x += SCHRITT_MM
-
-# Generate G-Code
-lines = []
-lines.append("; Hexrod Hollowing G-Code for LinuxCNC")
-lines.append(f"; Tip solid: {TIP_SOLID_MM}mm | Butt solid: {BUTT_SOLID_MM}mm")
-lines.append(f"; Glue lands: {', '.join(f'{s:.1f}mm' for s in steg_positions)}")
-lines.append(f"; Wall thickness: {WANDSTAERKE_MM}mm | Transition: {UEBERGANG_MM}mm")
-lines.append("")
-lines.append("G21  ; metric")
-lines.append("G90  ; absolute")
-lines.append("G94  ; feed in mm/min")
-lines.append("")
-lines.append(f"G0 Z{Z_RAPID:.3f}")
-lines.append("G0 X0")
-lines.append("")
-lines.append("; === Hollow milling pass ===")
-lines.append("")
-
-cutting = False
-for x, z in path:
-    if z < -0.01:
-        if not cutting:
-            lines.append(f"G0 X{x:.3f}")
-            lines.append(f"G1 Z{z:.4f} F{FEED_RATE}")
-            cutting = True
-        else:
-            lines.append(f"G1 X{x:.3f} Z{z:.4f} F{FEED_RATE}")
-    else:
-        if cutting:
-            lines.append(f"G1 X{x:.3f} Z{z:.4f} F{FEED_RATE}  ; -> land/end")
-            cutting = False
-
-lines.append("")
-lines.append(f"G0 Z{Z_RAPID:.3f}  ; retract")
-lines.append("G0 X0             ; home")
-lines.append("M2                ; end")
-
-gcode = "\n".join(lines)
-print(gcode)
-
-with open("hollowing.ngc", "w") as f:
-    f.write(gcode)
-print("\n; -> Saved as hollowing.ngc", file=sys.stderr)
+# Sample the toolpath and emit its G-code in a single pass: each sample is
+# computed, turned into G-code and streamed to stdout and a temporary file
+# beside the target, which replaces hollowing.ngc only once it is complete
+filename = "hollowing.ngc"
+tmpname  = filename + ".tmp"
+path = _iter_path(x_total, steg_positions, station_x, station_d)
+out  = sys.stdout.buffer.write
+try:
+    with open(tmpname, "wb", buffering=1 << 20) as f:
+        fw = f.write
+        for line in emit_hollow(path, steg_positions):
+            data = line.encode("utf-8")
+            out(data)
+            fw(data)
+except BaseException:
+    os.unlink(tmpname)
+    raise
+os.replace(tmpname, filename)
+print(f"\n; -> Saved as {filename}", file=sys.stderr)
@@ -13,6 +13,8 @@ Usage:
   Edit taper_data and machine parameters below, then run:
     python3 taper_gcode.py > taper.ngc
 """
+import os
+import sys
 
 # ─── TAPER DATA ───────────────────────────────────────────────────────────────
 # Format: (station_inches, flat_to_flat_dimension_mm)
@@ -46,50 +48,61 @@ def dimension_to_z(dim_mm):
     """Convert flat-to-flat dimension to Z cut depth (strip height = dim/2)."""
     return -(dim_mm / 2.0) + Z_OFFSET
 
-# ─── MAIN ─────────────────────────────────────────────────────────────────────
-
-stations = [(s * ZOLL_ZU_MM, d) for s, d in taper_data]
+def emit_taper(stations):
+    """Yield the taper program for the (x_mm, dimension) stations, line by line."""
+    yield "; Hexrod Taper G-Code for LinuxCNC\n"
+    yield f"; Taper: {taper_data[0][1]:.2f}mm (Tip) -> {taper_data[-1][1]:.2f}mm (Butt)\n"
+    yield "; Axes: X=length, Z=depth\n"
+    yield "\n"
+    yield "G21          ; metric\n"
+    yield "G90          ; absolute coordinates\n"
+    yield "G94          ; feed in mm/min\n"
+    yield "\n"
+    yield "; === START ===\n"
+    yield "G0 Z{:.3f}  ; rapid to safe height\n".format(Z_RAPID)
+    yield "G0 X0        ; home X\n"
+    yield "\n"
 
-lines = []
-lines.append("; Hexrod Taper G-Code for LinuxCNC")
-lines.append(f"; Taper: {taper_data[0][1]:.2f}mm (Tip) -> {taper_data[-1][1]:.2f}mm (Butt)")
-lines.append("; Axes: X=length, Z=depth")
-lines.append("")
-lines.append("G21          ; metric")
-lines.append("G90          ; absolute coordinates")
-lines.append("G94          ; feed in mm/min")
-lines.append("")
-lines.append("; === START ===")
-lines.append("G0 Z{:.3f}  ; rapid to safe height".format(Z_RAPID))
-lines.append("G0 X0        ; home X")
-lines.append("")
+    x0, d0 = stations[0]
+    z0 = dimension_to_z(d0)
+    yield f"; Tip: X={x0:.3f} Dim={d0:.3f}mm Z={z0:.4f}mm\n"
+    yield f"G0 X{x0:.3f}\n"
+    yield f"G1 Z{z0:.4f} F{FEED_RATE}\n"
+    yield "\n"
 
-x0, d0 = stations[0]
-z0 = dimension_to_z(d0)
-lines.append(f"; Tip: X={x0:.3f} Dim={d0:.3f}mm Z={z0:.4f}mm")
-lines.append(f"G0 X{x0:.3f}")
-lines.append(f"G1 Z{z0:.4f} F{FEED_RATE}")
-lines.append("")
+    for x, dim in stations[1:]:
+        z = dimension_to_z(dim)
+        yield f"; Station X={x:.1f}mm, Dim={dim:.3f}mm -> Z={z:.4f}mm\n"
+        yield f"G1 X{x:.3f} Z{z:.4f} F{FEED_RATE}\n"
 
-for x, dim in stations[1:]:
-    z = dimension_to_z(dim)
-    lines.append(f"; Station X={x:.1f}mm, Dim={dim:.3f}mm -> Z={z:.4f}mm")
-    lines.append(f"G1 X{x:.3f} Z{z:.4f} F{FEED_RATE}")
+    x_end = stations[-1][0] + EXTRA_LAENGE_MM
+    z_end = dimension_to_z(stations[-1][1])
+    yield f"G1 X{x_end:.3f} Z{z_end:.4f} F{FEED_RATE}  ; overshoot\n"
+    yield "\n"
+    yield "; === END ===\n"
+    yield f"G0 Z{Z_RAPID:.3f}\n"
+    yield "G0 X0\n"
+    yield "M2  ; program end\n"
 
-x_end = stations[-1][0] + EXTRA_LAENGE_MM
-z_end = dimension_to_z(stations[-1][1])
-lines.append(f"G1 X{x_end:.3f} Z{z_end:.4f} F{FEED_RATE}  ; overshoot")
-lines.append("")
-lines.append("; === END ===")
-lines.append(f"G0 Z{Z_RAPID:.3f}")
-lines.append("G0 X0")
-lines.append("M2  ; program end")
+# ─── MAIN ─────────────────────────────────────────────────────────────────────
 
-gcode = "\n".join(lines)
-print(gcode)
+stations = [(s * ZOLL_ZU_MM, d) for s, d in taper_data]
 
-with open("taper.ngc", "w") as f:
-    f.write(gcode)
+filename = "taper.ngc"
+tmpname  = filename + ".tmp"
 
-import sys
-print("\n; -> Saved as taper.ngc", file=sys.stderr)
+# Stream the G-code to stdout and a temporary file beside the target; the
+# file replaces taper.ngc only once the whole program has been written
+out = sys.stdout.buffer.write
+try:
+    with open(tmpname, "wb", buffering=1 << 20) as f:
+        fw = f.write
+        for line in emit_taper(stations):
+            data = line.encode("utf-8")
+            out(data)
+            fw(data)
+except BaseException:
+    os.unlink(tmpname)
+    raise
+os.replace(tmpname, filename)
+print(f"\n; -> Saved as {filename}", file=sys.stderr)